@@ -1,7 +1,10 @@
+from typing import Any
 from collections.abc import Iterable, Iterator
 import logging as log
 
+import json
 import sqlite3
+from enum import IntEnum
 from collections import namedtuple
 
 Distribution = namedtuple(
@@ -111,5 +114,101 @@ class DistRegistry:
         yield from map(Distribution._make, rows)
 
 
+class Phase(IntEnum):
+    PLANNED = 0
+    METADATA = 1
+    FILES = 2
+    PAGE = 3
+
+
+class SyncJournal:
+    # A package stays in the journal until its serial is committed, so an
+    # interrupted sync can be resumed from the last completed phase.
+    def __init__(self) -> None:
+        self.con = sqlite3.connect("journal.db")
+        with self.con:
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS t("
+                "package TEXT PRIMARY KEY,"
+                "serial INT,"
+                "phase INT NOT NULL,"
+                "metadata TEXT)"
+            )
+            self.con.execute(
+                "CREATE TABLE IF NOT EXISTS f("
+                "blake TEXT NOT NULL,"
+                "package TEXT NOT NULL,"
+                "PRIMARY KEY (blake, package))"
+            )
+            self.con.execute("CREATE INDEX IF NOT EXISTS i_package ON f(package)")
+
+    def plan(self, package_serials: dict[str, int | None]) -> None:
+        # progress is kept unless the upstream serial changed since planned
+        with self.con:
+            self.con.executemany(
+                "INSERT INTO t VALUES(?,?,?,NULL) ON CONFLICT(package) DO UPDATE "
+                "SET serial = excluded.serial, phase = excluded.phase, metadata = NULL "
+                "WHERE t.serial IS NOT excluded.serial",
+                (
+                    (package, serial, Phase.PLANNED)
+                    for package, serial in package_serials.items()
+                ),
+            )
+
+    def pending(self) -> list[str]:
+        with self.con:
+            rows = self.con.execute("SELECT package FROM t").fetchall()
+        return [row[0] for row in rows]
+
+    def phase(self, package: str) -> Phase:
+        with self.con:
+            row = self.con.execute(
+                "SELECT phase FROM t WHERE package = ?", (package,)
+            ).fetchone()
+        return Phase(row[0]) if row else Phase.PLANNED
+
+    def set_phase(self, package: str, phase: Phase) -> None:
+        log.debug("journaling %s as %s", package, phase.name)
+        with self.con:
+            self.con.execute(
+                "UPDATE t SET phase = ? WHERE package = ?", (phase, package)
+            )
+
+    def metadata(self, package: str) -> dict[str, Any] | None:
+        with self.con:
+            row = self.con.execute(
+                "SELECT metadata FROM t WHERE package = ?", (package,)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def set_metadata(self, package: str, metadata: dict[str, Any]) -> None:
+        log.debug("journaling metadata of %s", package)
+        with self.con:
+            self.con.execute(
+                "UPDATE t SET phase = ?, metadata = ? WHERE package = ?",
+                (Phase.METADATA, json.dumps(metadata), package),
+            )
+
+    def add_file(self, package: str, blake: str) -> None:
+        with self.con:
+            self.con.execute(
+                "INSERT OR IGNORE INTO f VALUES(?,?)", (blake, package)
+            )
+
+    def files(self, package: str) -> set[str]:
+        with self.con:
+            rows = self.con.execute(
+                "SELECT blake FROM f WHERE package = ?", (package,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def finish(self, package: str) -> None:
+        log.debug("removing %s from journal", package)
+        with self.con:
+            self.con.execute("DELETE FROM t WHERE package = ?", (package,))
+            self.con.execute("DELETE FROM f WHERE package = ?", (package,))
+
+
 local_state = SerialRegistry()
 local_dists = DistRegistry()
+sync_journal = SyncJournal()
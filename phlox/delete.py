@@ -4,7 +4,7 @@ import os
 import shutil
 
 from . import VerificationFailed
-from .db import local_state, local_dists, Distribution
+from .db import local_state, local_dists, sync_journal, Distribution
 from .util import dist_rel_path
 
 
@@ -28,6 +28,7 @@ async def delete(package: str) -> None:
     if package not in local_state:
         raise VerificationFailed(f"package {package} does not exist")
     del local_state[package]
+    sync_journal.finish(package)
     dists = local_dists.by_package(package)
     for dist in dists:
         delete_dist(dist)
@@ -8,7 +8,7 @@ import argparse
 from functools import partial
 
 from . import USER_AGENT
-from .db import local_state
+from .db import local_state, sync_journal
 from .upstream import PyPIUpstream
 from .sync import sync, generate_global_simple_page
 from .verify import verify
@@ -137,6 +137,10 @@ async def main() -> None:
             targets = arg.packages
         else:
             targets = [x[0] for x in set(remote_state.items()) ^ set(local_state)]
+            if resumed := sync_journal.pending():
+                log.info("Resuming %d unfinished packages from journal", len(resumed))
+                targets += resumed
+        sync_journal.plan({package: remote_state.get(package) for package in targets})
     else:
         if arg.packages:
             targets = arg.packages
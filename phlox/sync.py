@@ -7,7 +7,7 @@ from datetime import datetime
 import aiohttp
 
 from . import BadUpstream, VerificationFailed
-from .db import local_state, local_dists, Distribution
+from .db import local_state, local_dists, sync_journal, Distribution, Phase
 from .util import dist_rel_path
 from .upstream import Upstream
 from .verify import verify_file
@@ -66,42 +66,35 @@ async def generate_global_simple_page() -> None:
         f.write(html)
 
 
-async def sync(package: str, upstream: Upstream) -> None:
-    try:
-        metadata = await upstream.query_metadata(package)
-    except aiohttp.ClientResponseError as e:
-        if e.code == 404:
-            log.error("metadata of package %s is not found", package)
-            return
-        raise
-
-    if package in local_state:
-        if metadata["last_serial"] < local_state[package]:
-            raise BadUpstream(
-                f"local serial is newer than upstream for package {package}"
-            )
-
-    filtered = filter_metadata(package, metadata)
-    local_file = {dist.blake: dist for dist in local_dists.by_package(package)}
-    for release in filtered["releases"].values():
+async def _sync_dists(
+    package: str, metadata: dict[str, Any], upstream: Upstream
+) -> None:
+    local_file = {dist.blake for dist in local_dists.by_package(package)}
+    journaled = sync_journal.files(package)
+    for release in metadata["releases"].values():
         for file in release:
-            rel_path = dist_rel_path(file["digests"]["blake2b_256"], file["filename"])
+            blake = file["digests"]["blake2b_256"]
+            rel_path = dist_rel_path(blake, file["filename"])
+
+            if blake in journaled:
+                log.debug("skipping journaled file %s", rel_path)
+                continue
 
             try:
-                if file["digests"]["blake2b_256"] in local_file:
+                if blake in local_file:
                     verify_file(rel_path, file["size"], file["digests"]["sha256"])
                     log.debug("skipping file %s", rel_path)
-                    local_file.pop(file["digests"]["blake2b_256"])
+                    sync_journal.add_file(package, blake)
                     continue
             except VerificationFailed:
-                log.warning("File {rel_path} in database but not correct!")
+                log.warning("file %s in database but not correct!", rel_path)
 
             log.debug("downloading %s", rel_path)
             os.makedirs(os.path.dirname(rel_path), exist_ok=True)
             await upstream.fetch_dist(file, rel_path)
             local_dists.add(
                 Distribution(
-                    file["digests"]["blake2b_256"],
+                    blake,
                     file["digests"]["sha256"],
                     file["filename"],
                     package,
@@ -111,9 +104,54 @@ async def sync(package: str, upstream: Upstream) -> None:
                     ),
                 )
             )
+            sync_journal.add_file(package, blake)
+
+
+def _delete_stale_dists(package: str, metadata: dict[str, Any]) -> None:
+    wanted = {
+        file["digests"]["blake2b_256"]
+        for release in metadata["releases"].values()
+        for file in release
+    }
+    for dist in list(local_dists.by_package(package)):
+        if dist.blake not in wanted:
+            delete_dist(dist)
+
+
+async def sync(package: str, upstream: Upstream) -> None:
+    phase = sync_journal.phase(package)
+    metadata = sync_journal.metadata(package)
+    if metadata is None:
+        try:
+            metadata = await upstream.query_metadata(package)
+        except aiohttp.ClientResponseError as e:
+            if e.code == 404:
+                log.error("metadata of package %s is not found", package)
+                sync_journal.finish(package)
+                return
+            raise
+
+        if package in local_state:
+            if metadata["last_serial"] < local_state[package]:
+                raise BadUpstream(
+                    f"local serial is newer than upstream for package {package}"
+                )
+
+        sync_journal.set_metadata(package, metadata)
+        phase = Phase.METADATA
+    else:
+        log.info("Resuming package %s from phase %s", package, phase.name)
+
+    filtered = filter_metadata(package, metadata)
+    if phase < Phase.FILES:
+        await _sync_dists(package, filtered, upstream)
+        sync_journal.set_phase(package, Phase.FILES)
 
-    for dist in local_file.values():
-        delete_dist(dist)
+    if phase < Phase.PAGE:
+        # only after every download is recorded, so nothing wanted is removed
+        _delete_stale_dists(package, filtered)
+        await generate_simple_page(package, metadata)
+        sync_journal.set_phase(package, Phase.PAGE)
 
-    await generate_simple_page(package, metadata)
     local_state[package] = metadata["last_serial"]
+    sync_journal.finish(package)